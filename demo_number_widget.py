@@ -4,79 +4,58 @@ Demo script to show Number widget YAML output.
 This demonstrates what a real extraction would produce.
 """
 
-import yaml
-
-def create_demo_yaml():
-    """Create a demo YAML file showing Number widget structure."""
-    
-    yaml_data = {
-        'source_file': 'demo.psb',
-        'document_width': 1920,
-        'document_height': 1080,
-        'layers': [
-            {
-                'filename': 'Background.png',
-                'name': 'Background',
-                'x': 0,
-                'y': 0,
-                'width': 1920,
-                'height': 1080
-            }
-        ],
-        'widgets': {
-            'Speed': {
-                'type': 'number',
-                'digits': [
-                    {
-                        'name': 'hundreds',
-                        'has_decimal': False,
-                        'layers': [
-                            'Speed--hundreds--segment_A.png',
-                            'Speed--hundreds--segment_F.png',
-                            'Speed--hundreds--segment_B.png',
-                            'Speed--hundreds--segment_G.png',
-                            'Speed--hundreds--segment_E.png',
-                            'Speed--hundreds--segment_C.png',
-                            'Speed--hundreds--segment_D.png'
-                        ]
-                    },
-                    {
-                        'name': 'tens',
-                        'has_decimal': True,
-                        'layers': [
-                            'Speed--tens--segment_A.png',
-                            'Speed--tens--segment_F.png',
-                            'Speed--tens--segment_B.png',
-                            'Speed--tens--segment_G.png',
-                            'Speed--tens--segment_E.png',
-                            'Speed--tens--segment_C.png',
-                            'Speed--tens--segment_D.png',
-                            'Speed--tens--decimal.png'
-                        ]
-                    },
-                    {
-                        'name': 'ones',
-                        'has_decimal': False,
-                        'layers': [
-                            'Speed--ones--segment_A.png',
-                            'Speed--ones--segment_F.png',
-                            'Speed--ones--segment_B.png',
-                            'Speed--ones--segment_G.png',
-                            'Speed--ones--segment_E.png',
-                            'Speed--ones--segment_C.png',
-                            'Speed--ones--segment_D.png'
-                        ]
-                    }
-                ]
-            },
-            'StatusLight': {
-                'type': 'toggle',
-                'layers': ['StatusLight--light.png']
-            }
-        }
-    }
-    
-    return yaml_data
+# YAML written by extract_layers.py for a PSB with a Number widget
+DEMO_YAML = """\
+source_file: demo.psb
+document_width: 1920
+document_height: 1080
+layers:
+- filename: Background.png
+  name: Background
+  x: 0
+  y: 0
+  width: 1920
+  height: 1080
+widgets:
+  Speed:
+    type: number
+    digits:
+    - name: hundreds
+      has_decimal: false
+      layers:
+      - Speed--hundreds--segment_A.png
+      - Speed--hundreds--segment_F.png
+      - Speed--hundreds--segment_B.png
+      - Speed--hundreds--segment_G.png
+      - Speed--hundreds--segment_E.png
+      - Speed--hundreds--segment_C.png
+      - Speed--hundreds--segment_D.png
+    - name: tens
+      has_decimal: true
+      layers:
+      - Speed--tens--segment_A.png
+      - Speed--tens--segment_F.png
+      - Speed--tens--segment_B.png
+      - Speed--tens--segment_G.png
+      - Speed--tens--segment_E.png
+      - Speed--tens--segment_C.png
+      - Speed--tens--segment_D.png
+      - Speed--tens--decimal.png
+    - name: ones
+      has_decimal: false
+      layers:
+      - Speed--ones--segment_A.png
+      - Speed--ones--segment_F.png
+      - Speed--ones--segment_B.png
+      - Speed--ones--segment_G.png
+      - Speed--ones--segment_E.png
+      - Speed--ones--segment_C.png
+      - Speed--ones--segment_D.png
+  StatusLight:
+    type: toggle
+    layers:
+    - StatusLight--light.png
+"""
 
 
 def main():
@@ -97,9 +76,7 @@ def main():
     print("Generated YAML:")
     print("-" * 70)
     
-    demo_data = create_demo_yaml()
-    yaml_str = yaml.dump(demo_data, default_flow_style=False, sort_keys=False)
-    print(yaml_str)
+    print(DEMO_YAML)
     
     print("-" * 70)
     print()
@@ -3,16 +3,59 @@
 PSB/PSD Layer Extractor
 
 This script extracts layers from Adobe PSB/PSD files and saves them as individual
-images with their position information in a YAML file.
+images with their position information in a YAML file (and a JSON copy for
+the HTML preview pages).
 """
 
 import argparse
+import contextlib
+import hashlib
+import io
+import json
 import os
+import re
+import shutil
+import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from psd_tools import PSDImage
-from PIL import Image
-import yaml
+
+try:
+    import orjson
+except ImportError:
+    # orjson is optional, the standard library json module is used without it
+    orjson = None
+
+# zlib level for extracted PNGs. The layers are intermediate artifacts for the
+# HTML preview, so fast encoding matters more than the last few percent of size.
+PNG_COMPRESS_LEVEL = 1
+
+# Largest width or height a WebP image can have. Layers above this are still
+# written as PNG when --image-format webp is used.
+WEBP_MAX_SIZE = 16383
+
+# Pixels mapped to palette indexes at a time in to_palette_image, which bounds
+# the size of its temporary arrays on very large layers
+PALETTE_BAND_PIXELS = 1 << 20
+
+# Number of files passed to one oxipng invocation, to stay well below
+# command line length limits
+OXIPNG_BATCH_SIZE = 256
+
+# File in the output directory that records which content each layer image
+# was written from, for --incremental
+LAYER_CACHE_FILENAME = '.layer_cache.json'
+
+# Write buffer for the YAML file. Each layer entry is a small separate write,
+# so a larger buffer turns them into far fewer write() calls.
+YAML_WRITE_BUFFER = 256 * 1024
+
+# Without --verbose, progress is printed once per this many extracted layers
+PROGRESS_INTERVAL = 100
+
+# Characters replaced with '_' in filename components. \w matches exactly what
+# str.isalnum() accepts plus '_', so non-ASCII letters are still kept.
+_SANITIZE_RE = re.compile(r'[^\w \-]')
 
 
 def get_layer_bounds(layer):
@@ -35,29 +78,137 @@ def get_layer_bounds(layer):
     return None
 
 
-def extract_layer_image(layer, layer_index, output_dir, base_name, folder_path=None, toggle_name=None):
+def is_on_canvas(layer, document_width, document_height):
     """
-    Extract a single layer and save it as an image.
+    Check whether a layer has pixels inside the document.
     
     Args:
-        layer: The layer to extract
-        layer_index: Index of the layer for naming
-        output_dir: Directory to save the image
-        base_name: Base name for output files (not used in new naming scheme)
-        folder_path: List of folder names from root to this layer
-        toggle_name: Name of toggle controlling this layer (if any)
+        layer: A PSD layer object
+        document_width: Width of the document
+        document_height: Height of the document
         
     Returns:
-        dict: Layer information including filename, position, name, and toggle, or None if layer is empty
+        bool: False if the layer is empty or lies entirely outside the document
     """
     bounds = get_layer_bounds(layer)
     if not bounds:
+        return False
+    left, top, right, bottom = bounds
+    return left < document_width and top < document_height and right > 0 and bottom > 0
+
+
+def get_layer_content_key(layer):
+    """
+    Build a key identifying a layer's pixel content without decoding it.
+    
+    The key is derived from the layer size and a hash of the raw (still
+    compressed) channel data, so layers with identical pixels produce the
+    same key. This is typical for repeated digit segments in LCD templates.
+    
+    Args:
+        layer: A PSD layer object
+        
+    Returns:
+        tuple: (width, height, digest) or None if channel data is unavailable
+    """
+    try:
+        digest = hashlib.blake2b(digest_size=16)
+        for channel_info, channel in zip(layer._record.channel_info, layer._channels):
+            digest.update(f"{channel_info.id}:{int(channel.compression)}:{len(channel.data)}:".encode())
+            digest.update(channel.data)
+        return (layer.width, layer.height, digest.hexdigest())
+    except Exception:
         return None
+
+
+def to_palette_image(image):
+    """
+    Convert an RGBA image with at most 256 distinct colors to palette mode.
     
-    left, top, right, bottom = bounds
+    The conversion is exact: every distinct RGBA value gets its own palette
+    entry, with its alpha stored as PNG transparency. Single-color layers
+    with anti-aliased edges, like LCD segments, usually qualify and encode
+    faster and smaller as palette PNGs.
+    
+    Pixels are mapped in bands of PALETTE_BAND_PIXELS, so besides the one byte
+    per pixel index array the extra memory stays at a few tens of megabytes
+    regardless of the layer size.
+    
+    Args:
+        image: A PIL image
+        
+    Returns:
+        PIL.Image.Image: The image in 'P' mode, or None if it is not RGBA or
+        has more than 256 colors
+    """
+    if image.mode != 'RGBA':
+        return None
+    colors = image.getcolors(256)
+    if colors is None:
+        return None
+    
+    import numpy as np
+    from PIL import Image
+    
+    # Look up each pixel's palette index by its RGBA value packed into a uint32
+    palette = np.array([color for count, color in colors], dtype=np.uint8)
+    keys = palette.view(np.uint32).ravel()
+    order = np.argsort(keys)
+    keys = keys[order]
+    palette = palette[order]
+    width, height = image.size
+    indexes = np.empty((height, width), dtype=np.uint8)
+    band_rows = max(1, PALETTE_BAND_PIXELS // max(width, 1))
+    for top in range(0, height, band_rows):
+        bottom = min(top + band_rows, height)
+        band = np.asarray(image.crop((0, top, width, bottom)))
+        indexes[top:bottom] = np.searchsorted(keys, band.view(np.uint32)[..., 0])
+    
+    palette_image = Image.fromarray(indexes, 'P')
+    palette_image.putpalette(palette[:, :3].tobytes())
+    palette_image.info['transparency'] = palette[:, 3].tobytes()
+    return palette_image
+
+
+def write_json_file(data, path):
+    """
+    Write data to a compact JSON file, using orjson when it is installed.
+    
+    Args:
+        data: JSON-serializable data
+        path: Path of the file to write
+    """
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+
+
+def get_layer_filename(layer, layer_index, folder_path=None, image_format='png'):
+    """
+    Build the output filename of a layer from its folder path and name.
+    
+    Args:
+        layer: A PSD layer object
+        layer_index: Index of the layer, used to name unnamed layers
+        folder_path: List of folder names from root to this layer
+        image_format: 'png', or 'webp' for lossless WebP (PNG is used for layers
+            larger than WebP supports)
+        
+    Returns:
+        tuple: (filename, display_name), the display name without a [T] prefix
+    """
+    bounds = get_layer_bounds(layer)
+    if (image_format == 'webp' and bounds
+            and max(bounds[2] - bounds[0], bounds[3] - bounds[1]) <= WEBP_MAX_SIZE):
+        extension = 'webp'
+    else:
+        extension = 'png'
     
     # Get layer name or use index
-    layer_name = layer.name if hasattr(layer, 'name') and layer.name else f"layer_{layer_index}"
+    layer_name = getattr(layer, 'name', None) or f"layer_{layer_index}"
     
     # Remove [T] prefix from layer name if present (for display purposes)
     display_name = layer_name
@@ -65,31 +216,111 @@ def extract_layer_image(layer, layer_index, output_dir, base_name, folder_path=N
         display_name = layer_name[3:]
     
     # Sanitize filename component
-    safe_name = "".join(c if c.isalnum() or c in (' ', '-', '_') else '_' for c in display_name)
-    safe_name = safe_name.strip().replace(' ', '_')
+    safe_name = _SANITIZE_RE.sub('_', display_name).strip().replace(' ', '_')
     
     # Create filename based on folder structure
-    # Format: FolderName--SubFolder--LayerName.png
+    # Format: FolderName--SubFolder--LayerName.png (or .webp)
     if folder_path:
         filename_parts = folder_path + [safe_name]
-        filename = "--".join(filename_parts) + ".png"
+        filename = "--".join(filename_parts) + "." + extension
     else:
-        filename = f"{safe_name}.png"
+        filename = f"{safe_name}.{extension}"
     
-    filepath = output_dir / filename
+    return filename, display_name
+
+
+def extract_layer_image(layer, layer_index, output_dir, base_name, folder_path=None, toggle_name=None, png_cache=None,
+                        compress_level=PNG_COMPRESS_LEVEL, image_format='png', previous_keys=None,
+                        write_image=True):
+    """
+    Extract a single layer and save it as an image.
     
-    try:
-        # Convert layer to PIL Image
-        layer_image = layer.topil()
+    Args:
+        layer: The layer to extract
+        layer_index: Index of the layer for naming
+        output_dir: Directory to save the image (str or Path)
+        base_name: Base name for output files (not used in new naming scheme)
+        folder_path: List of folder names from root to this layer
+        toggle_name: Name of toggle controlling this layer (if any)
+        png_cache: Optional dict mapping layer content keys to already saved image paths.
+            Only layers that own their filename (write_image) add paths, so a cached
+            image is never overwritten by another layer later in the run
+        compress_level: zlib compression level for the PNG (0-9)
+        image_format: 'png', or 'webp' for lossless WebP (PNG is used for layers
+            larger than WebP supports)
+        previous_keys: Optional dict mapping image filenames to the cache keys they
+            were written with by a previous run; matching existing files are kept
+        write_image: Save the image; False when a later layer has the same filename
+            and its image replaces this one
         
-        # Crop to content bounds
-        # Note: topil() already returns the layer in its correct position, 
-        # but we need to crop to the actual bounds
-        width = right - left
-        height = top - bottom
+    Returns:
+        dict: Layer information including filename, position, name, and toggle, or None if layer is empty.
+        With previous_keys, the image's cache key is included as 'cache_key'.
+    """
+    bounds = get_layer_bounds(layer)
+    if not bounds:
+        return None
+    
+    left, top, right, bottom = bounds
+    width = right - left
+    height = bottom - top
+    
+    filename, display_name = get_layer_filename(layer, layer_index, folder_path, image_format)
+    
+    # Plain string joins: this runs once per layer and Path objects are
+    # comparatively expensive to construct
+    filepath = os.path.join(output_dir, filename)
+    # Write through a temporary file so a partly written image never
+    # replaces the previous one. The name is kept short so it fits wherever
+    # the (possibly very long) final filename does.
+    temp_path = os.path.join(output_dir, f".{layer_index}.tmp")
+    
+    try:
+        # Layers with identical pixels are only rendered and encoded once.
+        # Layers that do not write their file neither use nor fill the cache.
+        if write_image and (png_cache is not None or previous_keys is not None):
+            content_key = get_layer_content_key(layer)
+        else:
+            content_key = None
+        cached_path = png_cache.get(content_key) if content_key and png_cache is not None else None
+        cache_key = f"{content_key[0]}x{content_key[1]}:{content_key[2]}:{compress_level}" if content_key else None
         
-        # Save the image
-        layer_image.save(filepath, 'PNG')
+        if not write_image:
+            # The file belongs to a later layer with the same filename
+            pass
+        elif (previous_keys and cache_key and previous_keys.get(filename) == cache_key
+                and os.path.exists(filepath)):
+            # Unchanged since the previous run into this directory
+            if png_cache is not None:
+                png_cache[content_key] = filepath
+        elif cached_path:
+            if cached_path != filepath:
+                # A hard link costs no copy and no extra disk space; not every
+                # filesystem supports them
+                try:
+                    os.link(cached_path, temp_path)
+                except OSError:
+                    shutil.copyfile(cached_path, temp_path)
+                os.replace(temp_path, filepath)
+        else:
+            # Convert layer to PIL Image
+            layer_image = layer.topil()
+            
+            # Encode in memory first and write the file with a single call,
+            # so the temporary file is only created once encoding succeeded
+            image_data = io.BytesIO()
+            if filename.endswith('.webp'):
+                # method=0 is the fastest lossless WebP encoder setting
+                layer_image.save(image_data, 'WEBP', lossless=True, quality=0, method=0)
+            else:
+                layer_image = to_palette_image(layer_image) or layer_image
+                layer_image.save(image_data, 'PNG', compress_level=compress_level, optimize=False)
+            with open(temp_path, 'wb') as f:
+                f.write(image_data.getbuffer())
+            os.replace(temp_path, filepath)
+            
+            if content_key and png_cache is not None:
+                png_cache[content_key] = filepath
         
         layer_info = {
             'filename': filename,
@@ -104,14 +335,24 @@ def extract_layer_image(layer, layer_index, output_dir, base_name, folder_path=N
         if toggle_name:
             layer_info['toggle'] = toggle_name
         
+        if previous_keys is not None and cache_key:
+            layer_info['cache_key'] = cache_key
+        
         return layer_info
     except Exception as e:
-        print(f"Warning: Could not extract layer {layer_index} ({layer_name}): {e}", file=sys.stderr)
+        print(f"Warning: Could not extract layer {layer_index} ({display_name}): {e}", file=sys.stderr)
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
         return None
 
 
 def is_group(obj):
     """Check if an object is a group (iterable container)."""
+    # psd_tools layers answer this directly, without the TypeError that
+    # iter() raises for every pixel layer
+    method = getattr(obj, 'is_group', None)
+    if callable(method):
+        return method()
     try:
         iter(obj)
         return True
@@ -119,14 +360,18 @@ def is_group(obj):
         return False
 
 
-def process_layers_recursive(layer_group, layer_list, parent_offset=(0, 0), folder_path=None, toggle_path=None, widget_info=None, number_widget_info=None):
+def process_layers_recursive(layer_group, layer_list, folder_path=None, toggle_path=None, widget_info=None, number_widget_info=None):
     """
-    Recursively process layers, including nested groups.
+    Process layers, including nested groups.
+    
+    Nested groups are walked with an explicit stack rather than recursive
+    calls, so deeply nested documents cannot hit Python's recursion limit.
+    Layers in the same group share one folder path list, which must not be
+    modified.
     
     Args:
         layer_group: The layer or group to process
-        layer_list: List to append tuples of (layer, folder_path, toggle_name, widget_type, widget_name, number_widget_info)
-        parent_offset: Offset from parent groups (x, y)
+        layer_list: List to append tuples of (layer, folder_path, toggle_name, widget_info, number_widget_info)
         folder_path: List of folder names from root to current position
         toggle_path: Name of the toggle controlling this layer/group (if any)
         widget_info: Tuple of (widget_type, widget_name) if this layer is part of a widget
@@ -137,18 +382,29 @@ def process_layers_recursive(layer_group, layer_list, parent_offset=(0, 0), fold
     
     # Check if this is a group/container (iterable)
     if is_group(layer_group):
-        # This is a group, process children
-        for layer in layer_group:
+        # This is a group, process children depth-first. Each stack entry
+        # holds an iterator over a group's children together with the folder
+        # path, toggle and widget state those children inherit.
+        stack = [(iter(layer_group), list(folder_path), toggle_path, widget_info, number_widget_info)]
+        while stack:
+            children, folder_path, toggle_path, widget_info, number_widget_info = stack[-1]
+            layer = next(children, None)
+            if layer is None:
+                # All children of this group have been processed
+                stack.pop()
+                continue
+            
+            # psd_tools decodes the name on every access, so read it once
+            layer_name = getattr(layer, 'name', None)
+            
             # Skip layers/folders starting with #
-            if hasattr(layer, 'name') and layer.name.startswith('#'):
+            if layer_name is not None and layer_name.startswith('#'):
                 continue
             
             # Check if this child is also a group
             if is_group(layer):
                 # It's a nested group - add its name to the folder path
-                if hasattr(layer, 'name'):
-                    layer_name = layer.name
-                    
+                if layer_name is not None:
                     # Check if this group is a toggle [T]
                     current_toggle = toggle_path
                     current_widget_info = widget_info
@@ -209,27 +465,28 @@ def process_layers_recursive(layer_group, layer_list, parent_offset=(0, 0), fold
                         layer_name = widget_name
                     
                     # Sanitize folder name
-                    safe_folder_name = "".join(c if c.isalnum() or c in (' ', '-', '_') else '_' for c in layer_name)
-                    safe_folder_name = safe_folder_name.strip().replace(' ', '_')
-                    # Add folder to path and recurse
+                    safe_folder_name = _SANITIZE_RE.sub('_', layer_name).strip().replace(' ', '_')
+                    # Add folder to path and descend into it
                     new_path = folder_path + [safe_folder_name]
-                    process_layers_recursive(layer, layer_list, parent_offset, new_path, current_toggle, current_widget_info, current_number_widget_info)
+                    stack.append((iter(layer), new_path, current_toggle, current_widget_info, current_number_widget_info))
                 else:
-                    # Group without name, recurse without changing path
-                    process_layers_recursive(layer, layer_list, parent_offset, folder_path, toggle_path, widget_info, number_widget_info)
+                    # Group without name, descend without changing path
+                    stack.append((iter(layer), folder_path, toggle_path, widget_info, number_widget_info))
             else:
                 # It's a regular layer
                 current_toggle = toggle_path
                 current_widget_info = widget_info
                 current_number_widget_info = number_widget_info
                 # Check if this layer is a toggle [T]
-                if hasattr(layer, 'name') and layer.name.startswith('[T]'):
+                if layer_name is not None and layer_name.startswith('[T]'):
                     # Extract toggle name (remove [T] prefix)
-                    toggle_name = layer.name[3:]
+                    toggle_name = layer_name[3:]
                     current_toggle = toggle_name
                 
                 # Add it with current folder path, toggle name, widget info, and number widget info
-                layer_list.append((layer, folder_path[:], current_toggle, current_widget_info, current_number_widget_info))
+                # Nested paths are new lists (folder_path + [...]), so the
+                # group's list can be shared instead of copied per layer
+                layer_list.append((layer, folder_path, current_toggle, current_widget_info, current_number_widget_info))
     else:
         # This is a single layer (not a group)
         if hasattr(layer_group, 'name') and not layer_group.name.startswith('#'):
@@ -243,15 +500,82 @@ def process_layers_recursive(layer_group, layer_list, parent_offset=(0, 0), fold
             layer_list.append((layer_group, folder_path[:], toggle_path, widget_info, number_widget_info))
 
 
-def create_lcd_screen_html(output_dir, yaml_filename):
+@contextlib.contextmanager
+def _cancel_pending_jobs(executor):
     """
-    Create the LCD screen HTML file for embedding in the container.
+    Cancel the jobs an executor has not started when the block raises.
+    
+    executor.map submits every job up front, and leaving a `with executor`
+    block waits for all of them, so without this an error or Ctrl-C while
+    collecting results would still extract the rest of the document.
     
     Args:
-        output_dir: Directory containing the layers and YAML file
-        yaml_filename: Name of the YAML file
+        executor: The ThreadPoolExecutor or ProcessPoolExecutor running the jobs
     """
-    html_content = """<!DOCTYPE html>
+    try:
+        yield
+    except BaseException:
+        executor.shutdown(wait=True, cancel_futures=True)
+        raise
+
+
+# State of a process pool worker, set up by _init_extract_worker
+_worker_state = {}
+
+
+def _init_extract_worker(input_file, output_dir, base_name, compress_level, image_format, previous_keys):
+    """
+    Prepare a worker process for extract_psb_layers(processes=True).
+    
+    psd_tools layers reference the parsed file and cannot be sent to other
+    processes cheaply, so each worker opens the file once and walks it the
+    same way the parent did. Layers are then addressed by their index.
+    
+    Args:
+        input_file: Path to the PSB/PSD file
+        output_dir: Directory to save the images
+        base_name: Base name for output files
+        compress_level: zlib compression level for the PNGs
+        image_format: Image format for the layers ('png' or 'webp')
+        previous_keys: Cache keys from a previous run, or None
+    """
+    from psd_tools import PSDImage
+    
+    all_layers = []
+    process_layers_recursive(PSDImage.open(input_file), all_layers)
+    _worker_state.update(
+        all_layers=all_layers,
+        output_dir=output_dir,
+        base_name=base_name,
+        png_cache={},
+        compress_level=compress_level,
+        image_format=image_format,
+        previous_keys=previous_keys
+    )
+
+
+def _extract_worker(job):
+    """
+    Extract one layer in a worker process set up by _init_extract_worker.
+    
+    Args:
+        job: Tuple of (layer_index, write_image), the index of the layer in the
+            walked layer list and whether to save its image
+        
+    Returns:
+        dict: Layer information as returned by extract_layer_image, or None
+    """
+    layer_index, write_image = job
+    layer, folder_path, toggle_name, widget_info, number_widget_info = _worker_state['all_layers'][layer_index]
+    return extract_layer_image(layer, layer_index, _worker_state['output_dir'], _worker_state['base_name'],
+                               folder_path, toggle_name, _worker_state['png_cache'], _worker_state['compress_level'],
+                               _worker_state['image_format'], _worker_state['previous_keys'], write_image)
+
+
+# Page template for lcd-screen.html. Built once at import; {data_filename} is
+# replaced with the JSON layer data filename (str.format is not used because
+# the CSS and JavaScript are full of braces).
+_LCD_SCREEN_HTML = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -295,12 +619,13 @@ def create_lcd_screen_html(output_dir, yaml_filename):
     <div id="canvas-container"></div>
     
     <script>
-        const YAML_FILE = '""" + yaml_filename + """';
+        const DATA_FILE = '{data_filename}';
         
-        let yamlData = null;
+        let layerData = null;
         let layerElements = {};
         let shadowElements = {};
         let toggleStates = {};
+        let shadowUpdatePending = false;
         
         // Shadow state with default values
         let shadowState = {
@@ -310,179 +635,16 @@ def create_lcd_screen_html(output_dir, yaml_filename):
             angle: 315
         };
         
-        // Helper function to strip quotes from YAML values
-        function stripQuotes(value) {
-            value = value.trim();
-            if ((value.startsWith("'") && value.endsWith("'")) || 
-                (value.startsWith('"') && value.endsWith('"'))) {
-                return value.slice(1, -1);
-            }
-            return value;
-        }
-        
-        // Simple YAML parser for our specific format
-        function parseYAML(yamlText) {
-            const lines = yamlText.split('\\n');
-            const data = {
-                layers: [],
-                widgets: {}
-            };
-            let currentLayer = null;
-            let currentWidget = null;
-            let inWidgetsSection = false;
-            let inLayersSection = false;
-            
-            for (let i = 0; i < lines.length; i++) {
-                const line = lines[i];
-                const trimmed = line.trim();
-                
-                if (trimmed === '' || trimmed.startsWith('#')) continue;
-                
-                // Check for main sections
-                if (line.match(/^widgets:/)) {
-                    inWidgetsSection = true;
-                    inLayersSection = false;
-                    continue;
-                }
-                if (line.match(/^layers:/)) {
-                    inLayersSection = true;
-                    inWidgetsSection = false;
-                    continue;
-                }
-                
-                // Parse layers section
-                if (inLayersSection && line.match(/^\\s*-\\s+\\w+:/)) {
-                    if (currentLayer) {
-                        data.layers.push(currentLayer);
-                    }
-                    currentLayer = {};
-                    const keyVal = line.match(/^\\s*-\\s+(\\w+):\\s*(.*)$/);
-                    if (keyVal) {
-                        const key = keyVal[1];
-                        const value = stripQuotes(keyVal[2]);
-                        currentLayer[key] = isNaN(value) ? value : parseInt(value);
-                    }
-                } else if (inLayersSection && currentLayer) {
-                    const match = line.match(/^\\s+(\\w+):\\s*(.*)$/);
-                    if (match) {
-                        const key = match[1];
-                        const value = stripQuotes(match[2]);
-                        currentLayer[key] = isNaN(value) ? value : parseInt(value);
-                    }
-                }
-                
-                // Parse widgets section
-                if (inWidgetsSection) {
-                    const widgetMatch = line.match(/^\\s+(\\w+):/);
-                    if (widgetMatch && line.match(/^\\s{2}\\w+:/)) {
-                        const widgetName = widgetMatch[1];
-                        currentWidget = widgetName;
-                        data.widgets[widgetName] = { type: 'toggle', layers: [] };
-                    } else if (currentWidget && line.match(/^\\s{4}(\\w+):\\s*(.*)$/)) {
-                        // Parse widget properties (type, segments, has_decimal, digits, etc.)
-                        const match = line.match(/^\\s{4}(\\w+):\\s*(.*)$/);
-                        const key = match[1];
-                        let value = stripQuotes(match[2]);
-                        
-                        // Skip if this is the 'layers:' or 'digits:' line (will be followed by array items)
-                        if ((key === 'layers' || key === 'digits') && value === '') {
-                            // Ensure array exists
-                            if (!data.widgets[currentWidget][key]) {
-                                data.widgets[currentWidget][key] = [];
-                            }
-                        } else {
-                            // Convert boolean strings
-                            if (value === 'true') value = true;
-                            else if (value === 'false') value = false;
-                            else if (!isNaN(value) && value !== '') value = parseInt(value);
-                            data.widgets[currentWidget][key] = value;
-                        }
-                    } else if (currentWidget && line.match(/^\\s{4}-\\s+(.+)$/)) {
-                        // Digit array item (for Number widgets) - starts with '    - name:'
-                        if (line.match(/^\\s{4}-\\s+name:/)) {
-                            const nameMatch = line.match(/^\\s{4}-\\s+name:\\s*(.*)$/);
-                            if (nameMatch) {
-                                const digitName = stripQuotes(nameMatch[1]);
-                                if (!data.widgets[currentWidget].digits) {
-                                    data.widgets[currentWidget].digits = [];
-                                }
-                                data.widgets[currentWidget].digits.push({
-                                    name: digitName,
-                                    has_decimal: false,
-                                    layers: []
-                                });
-                            }
-                        } else {
-                            // Regular layer file (for non-Number widgets like toggle/digit/range)
-                            const layerFile = stripQuotes(line.match(/^\\s{4}-\\s+(.+)$/)[1]);
-                            if (!data.widgets[currentWidget].layers) {
-                                data.widgets[currentWidget].layers = [];
-                            }
-                            data.widgets[currentWidget].layers.push(layerFile);
-                        }
-                    } else if (currentWidget && line.match(/^\\s{6}(\\w+):\\s*(.*)$/)) {
-                        // Digit properties (has_decimal, layers) - only for Number widgets
-                        const match = line.match(/^\\s{6}(\\w+):\\s*(.*)$/);
-                        const key = match[1];
-                        let value = stripQuotes(match[2]);
-                        
-                        if (data.widgets[currentWidget].digits && data.widgets[currentWidget].digits.length > 0) {
-                            const currentDigit = data.widgets[currentWidget].digits[data.widgets[currentWidget].digits.length - 1];
-                            if (key === 'layers' && value === '') {
-                                // layers array will follow
-                                if (!currentDigit.layers) {
-                                    currentDigit.layers = [];
-                                }
-                            } else {
-                                if (value === 'true') value = true;
-                                else if (value === 'false') value = false;
-                                else if (!isNaN(value) && value !== '') value = parseInt(value);
-                                currentDigit[key] = value;
-                            }
-                        }
-                    } else if (currentWidget && line.match(/^\\s{6}-\\s+(.+)$/)) {
-                        // Layer file in digit's layers array (for Number widgets)
-                        const layerFile = stripQuotes(line.match(/^\\s{6}-\\s+(.+)$/)[1]);
-                        if (data.widgets[currentWidget].digits && data.widgets[currentWidget].digits.length > 0) {
-                            const currentDigit = data.widgets[currentWidget].digits[data.widgets[currentWidget].digits.length - 1];
-                            if (!currentDigit.layers) {
-                                currentDigit.layers = [];
-                            }
-                            currentDigit.layers.push(layerFile);
-                        }
-                    }
-                }
-                
-                // Top-level properties
-                const topMatch = line.match(/^(\\w+):\\s*(.*)$/);
-                if (topMatch && !inLayersSection && !inWidgetsSection) {
-                    const key = topMatch[1];
-                    const value = stripQuotes(topMatch[2]);
-                    if (key !== 'layers' && key !== 'widgets') {
-                        data[key] = isNaN(value) ? value : parseInt(value);
-                    }
-                }
-            }
-            
-            if (currentLayer) {
-                data.layers.push(currentLayer);
-            }
-            
-            return data;
-        }
-        
-        // Load and parse YAML file
-        async function loadYAML() {
+        // Load layer data file
+        async function loadLayerData() {
             try {
-                const response = await fetch(YAML_FILE);
+                const response = await fetch(DATA_FILE);
                 if (!response.ok) {
-                    throw new Error(`Failed to load YAML file: ${response.statusText}`);
+                    throw new Error(`Failed to load layer data file: ${response.statusText}`);
                 }
-                const yamlText = await response.text();
-                const data = parseYAML(yamlText);
-                return data;
+                return await response.json();
             } catch (error) {
-                console.error('Error loading YAML:', error);
+                console.error('Error loading layer data:', error);
                 document.body.innerHTML = 
                     '<div class="error"><h2>Error</h2><p>' + error.message + '</p></div>';
                 throw error;
@@ -502,8 +664,17 @@ def create_lcd_screen_html(output_dir, yaml_filename):
             // Scale container to fit viewport while maintaining aspect ratio
             scaleContainer();
             
-            // Create image elements for each layer
-            data.layers.forEach((layer, index) => {
+            // Create image elements for each layer (layer fields are stored
+            // as parallel arrays, one entry per layer)
+            const layers = data.layers;
+            layers.filename.forEach((filename, index) => {
+                const layer = {
+                    filename: filename,
+                    name: layers.name[index],
+                    x: layers.x[index],
+                    y: layers.y[index]
+                };
+                
                 // Create shadow element first (so it renders behind the main layer)
                 const shadowImg = document.createElement('img');
                 shadowImg.src = layer.filename;
@@ -546,10 +717,10 @@ def create_lcd_screen_html(output_dir, yaml_filename):
         // Scale container to fit viewport
         function scaleContainer() {
             const container = document.getElementById('canvas-container');
-            if (!container || !yamlData) return;
+            if (!container || !layerData) return;
             
-            const docWidth = yamlData.document_width;
-            const docHeight = yamlData.document_height;
+            const docWidth = layerData.document_width;
+            const docHeight = layerData.document_height;
             const viewportWidth = window.innerWidth;
             const viewportHeight = window.innerHeight;
             
@@ -638,13 +809,13 @@ def create_lcd_screen_html(output_dir, yaml_filename):
         
         // SetToggle function - called from parent window
         window.SetToggle = function(name, value) {
-            if (!yamlData || !yamlData.widgets || !yamlData.widgets[name]) {
-                console.warn(`Toggle "${name}" not found in YAML`);
+            if (!layerData || !layerData.widgets || !layerData.widgets[name]) {
+                console.warn(`Toggle "${name}" not found in layer data`);
                 return;
             }
             
             toggleStates[name] = value;
-            const widget = yamlData.widgets[name];
+            const widget = layerData.widgets[name];
             
             // Update visibility of all layers controlled by this toggle
             widget.layers.forEach(filename => {
@@ -706,18 +877,26 @@ def create_lcd_screen_html(output_dir, yaml_filename):
             shadowState.offsetDistance = offsetDistance;
             shadowState.angle = angle;
             
-            updateShadows();
+            // Slider drags call this for every input event; restyle the
+            // shadow layers at most once per animation frame
+            if (!shadowUpdatePending) {
+                shadowUpdatePending = true;
+                requestAnimationFrame(() => {
+                    shadowUpdatePending = false;
+                    updateShadows();
+                });
+            }
         };
         
         // SetDigit function - called from parent window
         // Supports both 7-segment and 16-segment displays
         window.SetDigit = function(name, character, showDecimal) {
-            if (!yamlData || !yamlData.widgets || !yamlData.widgets[name]) {
-                console.warn(`Digit widget "${name}" not found in YAML`);
+            if (!layerData || !layerData.widgets || !layerData.widgets[name]) {
+                console.warn(`Digit widget "${name}" not found in layer data`);
                 return;
             }
             
-            const widget = yamlData.widgets[name];
+            const widget = layerData.widgets[name];
             if (widget.type !== 'digit') {
                 console.warn(`Widget "${name}" is not a digit widget`);
                 return;
@@ -774,12 +953,12 @@ def create_lcd_screen_html(output_dir, yaml_filename):
         
         // SetRange function - called from parent window
         window.SetRange = function(name, start, end) {
-            if (!yamlData || !yamlData.widgets || !yamlData.widgets[name]) {
-                console.warn(`Range widget "${name}" not found in YAML`);
+            if (!layerData || !layerData.widgets || !layerData.widgets[name]) {
+                console.warn(`Range widget "${name}" not found in layer data`);
                 return;
             }
             
-            const widget = yamlData.widgets[name];
+            const widget = layerData.widgets[name];
             if (widget.type !== 'range') {
                 console.warn(`Widget "${name}" is not a range widget`);
                 return;
@@ -806,12 +985,12 @@ def create_lcd_screen_html(output_dir, yaml_filename):
         
         // SetNumberValue function - called from parent window
         window.SetNumberValue = function(name, value, addLeadingZeros, decimalPlaces) {
-            if (!yamlData || !yamlData.widgets || !yamlData.widgets[name]) {
-                console.warn(`Number widget "${name}" not found in YAML`);
+            if (!layerData || !layerData.widgets || !layerData.widgets[name]) {
+                console.warn(`Number widget "${name}" not found in layer data`);
                 return;
             }
             
-            const widget = yamlData.widgets[name];
+            const widget = layerData.widgets[name];
             if (widget.type !== 'number') {
                 console.warn(`Widget "${name}" is not a number widget`);
                 return;
@@ -969,12 +1148,12 @@ def create_lcd_screen_html(output_dir, yaml_filename):
         // SetString function - called from parent window
         // Displays alphanumeric text using 16-segment digits
         window.SetString = function(name, text) {
-            if (!yamlData || !yamlData.widgets || !yamlData.widgets[name]) {
-                console.warn(`String widget "${name}" not found in YAML`);
+            if (!layerData || !layerData.widgets || !layerData.widgets[name]) {
+                console.warn(`String widget "${name}" not found in layer data`);
                 return;
             }
             
-            const widget = yamlData.widgets[name];
+            const widget = layerData.widgets[name];
             if (widget.type !== 'string') {
                 console.warn(`Widget "${name}" is not a string widget`);
                 return;
@@ -1075,8 +1254,8 @@ def create_lcd_screen_html(output_dir, yaml_filename):
         // Initialize
         async function init() {
             try {
-                yamlData = await loadYAML();
-                createLayers(yamlData);
+                layerData = await loadLayerData();
+                createLayers(layerData);
                 
                 // Listen for window resize
                 window.addEventListener('resize', scaleContainer);
@@ -1090,23 +1269,26 @@ def create_lcd_screen_html(output_dir, yaml_filename):
     </script>
 </body>
 </html>"""
-    
-    html_path = output_dir / "lcd-screen.html"
-    with open(html_path, 'w') as f:
-        f.write(html_content)
-    
-    return html_path
 
 
-def create_index_html(output_dir, yaml_filename):
+def create_lcd_screen_html(output_dir, data_filename):
     """
-    Create the index.html container page with widgets on left and LCD screen on right.
+    Create the LCD screen HTML file for embedding in the container.
     
     Args:
-        output_dir: Directory containing the layers and YAML file
-        yaml_filename: Name of the YAML file
+        output_dir: Directory containing the layers and layer data file
+        data_filename: Name of the JSON layer data file
     """
-    html_content = """<!DOCTYPE html>
+    html_content = _LCD_SCREEN_HTML.replace('{data_filename}', data_filename)
+    
+    html_path = output_dir / "lcd-screen.html"
+    html_path.write_text(html_content, encoding='utf-8')
+    
+    return html_path
+
+
+# Page template for index.html, see _LCD_SCREEN_HTML.
+_INDEX_HTML = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -1230,140 +1412,17 @@ def create_index_html(output_dir, yaml_filename):
     </div>
     
     <script>
-        const YAML_FILE = '""" + yaml_filename + """';
+        const DATA_FILE = '{data_filename}';
         let lcdWindow = null;
         
-        // Helper function to strip quotes from YAML values
-        function stripQuotes(value) {
-            value = value.trim();
-            if ((value.startsWith("'") && value.endsWith("'")) || 
-                (value.startsWith('"') && value.endsWith('"'))) {
-                return value.slice(1, -1);
-            }
-            return value;
-        }
-        
-        // Simple YAML parser for our specific format
-        function parseYAML(yamlText) {
-            const lines = yamlText.split('\\n');
-            const data = {
-                widgets: {}
-            };
-            let currentWidget = null;
-            let inWidgetsSection = false;
-            
-            for (let i = 0; i < lines.length; i++) {
-                const line = lines[i];
-                const trimmed = line.trim();
-                
-                if (trimmed === '' || trimmed.startsWith('#')) continue;
-                
-                // Check for widgets section
-                if (line.match(/^widgets:/)) {
-                    inWidgetsSection = true;
-                    continue;
-                }
-                
-                // Exit widgets section if we hit another top-level key
-                if (inWidgetsSection && line.match(/^\\w+:/) && !line.match(/^\\s/)) {
-                    inWidgetsSection = false;
-                }
-                
-                // Parse widgets
-                if (inWidgetsSection) {
-                    const widgetMatch = line.match(/^\\s+(\\w+):/);
-                    if (widgetMatch && line.match(/^\\s{2}\\w+:/)) {
-                        const widgetName = widgetMatch[1];
-                        currentWidget = widgetName;
-                        data.widgets[widgetName] = { type: 'toggle', layers: [] };
-                    } else if (currentWidget && line.match(/^\\s{4}(\\w+):\\s*(.*)$/)) {
-                        // Parse widget properties (type, segments, has_decimal, digits, etc.)
-                        const match = line.match(/^\\s{4}(\\w+):\\s*(.*)$/);
-                        const key = match[1];
-                        let value = stripQuotes(match[2]);
-                        
-                        // Skip if this is the 'layers:' or 'digits:' line (will be followed by array items)
-                        if ((key === 'layers' || key === 'digits') && value === '') {
-                            // Ensure array exists
-                            if (!data.widgets[currentWidget][key]) {
-                                data.widgets[currentWidget][key] = [];
-                            }
-                        } else {
-                            // Convert boolean strings
-                            if (value === 'true') value = true;
-                            else if (value === 'false') value = false;
-                            else if (!isNaN(value) && value !== '') value = parseInt(value);
-                            data.widgets[currentWidget][key] = value;
-                        }
-                    } else if (currentWidget && line.match(/^\\s{4}-\\s+(.+)$/)) {
-                        // Could be digit array item or regular widget layer
-                        if (line.match(/^\\s{4}-\\s+name:/)) {
-                            // Digit array item for Number widgets
-                            const nameMatch = line.match(/^\\s{4}-\\s+name:\\s*(.*)$/);
-                            if (nameMatch) {
-                                const digitName = stripQuotes(nameMatch[1]);
-                                if (!data.widgets[currentWidget].digits) {
-                                    data.widgets[currentWidget].digits = [];
-                                }
-                                data.widgets[currentWidget].digits.push({
-                                    name: digitName,
-                                    has_decimal: false,
-                                    layers: []
-                                });
-                            }
-                        } else {
-                            // Regular layer file for non-Number widgets
-                            const layerFile = stripQuotes(line.match(/^\\s{4}-\\s+(.+)$/)[1]);
-                            if (!data.widgets[currentWidget].layers) {
-                                data.widgets[currentWidget].layers = [];
-                            }
-                            data.widgets[currentWidget].layers.push(layerFile);
-                        }
-                    } else if (currentWidget && line.match(/^\\s{6}(\\w+):\\s*(.*)$/)) {
-                        // Digit properties (has_decimal, layers) - only if we have digits
-                        const match = line.match(/^\\s{6}(\\w+):\\s*(.*)$/);
-                        const key = match[1];
-                        let value = stripQuotes(match[2]);
-                        
-                        if (data.widgets[currentWidget].digits && data.widgets[currentWidget].digits.length > 0) {
-                            const currentDigit = data.widgets[currentWidget].digits[data.widgets[currentWidget].digits.length - 1];
-                            if (key === 'layers' && value === '') {
-                                if (!currentDigit.layers) {
-                                    currentDigit.layers = [];
-                                }
-                            } else {
-                                if (value === 'true') value = true;
-                                else if (value === 'false') value = false;
-                                else if (!isNaN(value) && value !== '') value = parseInt(value);
-                                currentDigit[key] = value;
-                            }
-                        }
-                    } else if (currentWidget && line.match(/^\\s{6}-\\s+(.+)$/)) {
-                        // Layer file in digit's layers array (for Number widgets)
-                        const layerFile = stripQuotes(line.match(/^\\s{6}-\\s+(.+)$/)[1]);
-                        if (data.widgets[currentWidget].digits && data.widgets[currentWidget].digits.length > 0) {
-                            const currentDigit = data.widgets[currentWidget].digits[data.widgets[currentWidget].digits.length - 1];
-                            if (!currentDigit.layers) {
-                                currentDigit.layers = [];
-                            }
-                            currentDigit.layers.push(layerFile);
-                        }
-                    }
-                }
-            }
-            
-            return data;
-        }
-        
-        // Load widgets from YAML
+        // Load widgets from the layer data file
         async function loadWidgets() {
             try {
-                const response = await fetch(YAML_FILE);
+                const response = await fetch(DATA_FILE);
                 if (!response.ok) {
-                    throw new Error(`Failed to load YAML file: ${response.statusText}`);
+                    throw new Error(`Failed to load layer data file: ${response.statusText}`);
                 }
-                const yamlText = await response.text();
-                const data = parseYAML(yamlText);
+                const data = await response.json();
                 
                 const container = document.getElementById('widgets-container');
                 
@@ -1837,30 +1896,109 @@ def create_index_html(output_dir, yaml_filename):
     </script>
 </body>
 </html>"""
+
+
+def create_index_html(output_dir, data_filename):
+    """
+    Create the index.html container page with widgets on left and LCD screen on right.
+    
+    Args:
+        output_dir: Directory containing the layers and layer data file
+        data_filename: Name of the JSON layer data file
+    """
+    html_content = _INDEX_HTML.replace('{data_filename}', data_filename)
     
     html_path = output_dir / "index.html"
-    with open(html_path, 'w') as f:
-        f.write(html_content)
+    html_path.write_text(html_content, encoding='utf-8')
     
     return html_path
 
 
-def extract_psb_layers(input_file, output_dir=None):
+def optimize_pngs(png_paths, tool, jobs=None):
+    """
+    Recompress PNG files in place with an external optimizer.
+    
+    Args:
+        png_paths: Paths of the PNG files to optimize
+        tool: 'oxipng' (lossless) or 'pngquant' (lossy palette quantization)
+        jobs: Number of files to optimize in parallel (defaults to the number of CPUs)
+        
+    Returns:
+        bool: True if the optimizer ran, False if it is not installed
+    """
+    executable = shutil.which(tool)
+    if executable is None:
+        return False
+    
+    workers = jobs or os.cpu_count() or 1
+    png_paths = [os.fspath(path) for path in png_paths]
+    
+    if tool == 'oxipng':
+        # oxipng parallelizes across the files of one invocation itself
+        for start in range(0, len(png_paths), OXIPNG_BATCH_SIZE):
+            subprocess.run([executable, '-o', '2', '--strip', 'safe', '--threads', str(workers),
+                            *png_paths[start:start + OXIPNG_BATCH_SIZE]])
+    else:
+        # pngquant handles one file per process; --skip-if-larger keeps the
+        # original when quantizing does not help
+        def quantize(png_path):
+            subprocess.run([executable, '--force', '--skip-if-larger', '--ext', '.png', png_path])
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(quantize, png_paths))
+    
+    return True
+
+
+def extract_psb_layers(input_file, output_dir=None, jobs=None, verbose=False, processes=False,
+                       compress_level=PNG_COMPRESS_LEVEL, image_format='png', skip_hidden=False,
+                       postopt=None, incremental=False, write_yaml=True):
     """
     Extract all layers from a PSB/PSD file.
     
     Args:
         input_file: Path to the PSB/PSD file
         output_dir: Directory to save extracted layers (defaults to input_file_layers)
+        jobs: Number of layers to extract in parallel (defaults to the number of CPUs)
+        verbose: Print a line for every extracted layer instead of periodic progress
+        processes: Extract layers in worker processes instead of threads
+        compress_level: zlib compression level for the PNGs (0-9)
+        image_format: 'png', or 'webp' to save layers as lossless WebP
+        skip_hidden: Skip layers that are hidden in the document, directly or
+            through a hidden parent group, and layers with zero opacity
+        postopt: Optional PNG optimizer to run after extraction ('oxipng' or 'pngquant')
+        incremental: Keep layer images from a previous run into output_dir whose
+            layer content and settings have not changed, instead of re-encoding them.
+            Not recorded for the next run when postopt is 'pngquant'
+        write_yaml: Write the YAML file; the HTML pages only need the JSON file
         
     Returns:
-        tuple: (output_directory, yaml_file_path)
+        tuple: (output_directory, yaml_file_path), the path is None without write_yaml
     """
+    # Imported here so that `--help` and argument errors do not pay for
+    # loading psd_tools (and PIL/numpy through it) and PyYAML
+    from psd_tools import PSDImage
+    if write_yaml:
+        import yaml
+        
+        try:
+            from yaml import CSafeDumper as YAMLDumper
+        except ImportError:
+            # PyYAML built without libyaml, fall back to the pure-Python dumper
+            from yaml import SafeDumper as YAMLDumper
+    
     input_path = Path(input_file)
     
     if not input_path.exists():
         raise FileNotFoundError(f"Input file not found: {input_file}")
     
+    # Fail before extracting anything instead of dropping every layer when
+    # Pillow was built without libwebp
+    if image_format == 'webp':
+        from PIL import features
+        if not features.check('webp'):
+            raise RuntimeError("WebP output requested, but Pillow was built without WebP support")
+    
     # Determine output directory
     if output_dir is None:
         output_dir = input_path.parent / f"{input_path.stem}_layers"
@@ -1876,161 +2014,295 @@ def extract_psb_layers(input_file, output_dir=None):
     psd = PSDImage.open(input_file)
     
     print(f"Document size: {psd.width}x{psd.height}")
-    print(f"Number of layers: {len(list(psd.descendants()))}")
     
     # Collect all layers (including nested ones)
     all_layers = []
     process_layers_recursive(psd, all_layers)
+    print(f"Number of layers: {len(all_layers)}")
+    
+    # Empty layers, layers entirely outside the document (which the preview
+    # never shows) and, if requested, hidden or fully transparent layers are
+    # dropped before being scheduled, so they are never decoded. Indexes into
+    # all_layers are kept; they name unnamed layers.
+    layer_jobs = [
+        (idx, entry) for idx, entry in enumerate(all_layers)
+        if is_on_canvas(entry[0], psd.width, psd.height)
+        and not (skip_hidden and (not entry[0].is_visible() or entry[0].opacity == 0))
+    ]
     
     # Extract each layer and collect widget information
-    layers_info = []
     widgets = {}  # Dictionary to store toggle, digit, range, and number information
     base_name = input_path.stem
     number_widgets_digits = {}  # Track digits for Number widgets: {number_widget_name: [digit_info_list]}
+    png_cache = {}  # Saved PNG paths by layer content key, for duplicate layers
+    layer_columns = {  # Layer fields for the JSON layer data file, one list per field
+        'filename': [],
+        'name': [],
+        'x': [],
+        'y': [],
+        'width': [],
+        'height': [],
+        'toggle': []  # None for layers outside a toggle
+    }
+    layer_count = 0
     
-    for idx, (layer, folder_path, toggle_name, widget_info, number_widget_info) in enumerate(all_layers):
-        layer_info = extract_layer_image(layer, idx, output_dir, base_name, folder_path, toggle_name)
-        if layer_info:
-            layers_info.append(layer_info)
-            print(f"Extracted: {layer_info['filename']} at ({layer_info['x']}, {layer_info['y']})")
-            
-            # Collect toggle information
-            if toggle_name:
-                if toggle_name not in widgets:
-                    widgets[toggle_name] = {
-                        'type': 'toggle',
-                        'layers': []
-                    }
-                widgets[toggle_name]['layers'].append(layer_info['filename'])
-            
-            # Handle Number/String widget digits
-            if number_widget_info:
-                parent_widget_type, number_widget_name, digit_type, digit_name = number_widget_info
-                
-                # Initialize Number or String widget if not exists
-                if number_widget_name not in widgets:
-                    widget_type = 'number' if parent_widget_type == 'N' else 'string'
-                    widgets[number_widget_name] = {
-                        'type': widget_type,
-                        'digits': []
-                    }
-                    number_widgets_digits[number_widget_name] = []
-                
-                # Check if this digit is already tracked
-                digit_found = False
-                for digit_info in number_widgets_digits[number_widget_name]:
-                    if digit_info['name'] == digit_name:
-                        # Add layer to existing digit
-                        digit_info['layers'].append(layer_info['filename'])
-                        digit_found = True
-                        break
+    # With incremental, images are only re-encoded when their layer changed
+    # since the last run, as recorded in the layer cache file. Every run
+    # removes the file before writing any image, so it can never describe
+    # images that a later run (with or without incremental) has replaced;
+    # incremental runs write it again at the end.
+    cache_path = output_dir / LAYER_CACHE_FILENAME
+    previous_keys = None
+    cache_keys = {}
+    if incremental:
+        previous_keys = {}
+        try:
+            with open(cache_path, encoding='utf-8') as f:
+                previous_keys = json.load(f)
+        except (OSError, ValueError):
+            pass
+    cache_path.unlink(missing_ok=True)
+    
+    # Create YAML file
+    yaml_filename = f"{base_name}.yml"
+    yaml_path = output_dir / yaml_filename if write_yaml else None
+    
+    layer_dir = os.fspath(output_dir)
+    
+    # Layers with the same filename would overwrite each other's image in
+    # whatever order the workers finish. Like sequential extraction, the
+    # last of them owns the file, and only that one writes it.
+    filename_owners = {}
+    for idx, (layer, folder_path, *_) in layer_jobs:
+        filename_owners[get_layer_filename(layer, idx, folder_path, image_format)[0]] = idx
+    writing_jobs = set(filename_owners.values())
+    
+    def extract(item):
+        idx, (layer, folder_path, toggle_name, widget_info, number_widget_info) = item
+        return extract_layer_image(layer, idx, layer_dir, base_name, folder_path, toggle_name, png_cache, compress_level,
+                                   image_format, previous_keys, idx in writing_jobs)
+    
+    workers = jobs or os.cpu_count() or 1
+    if processes:
+        # Every worker process opens its own copy of the file, which costs
+        # memory but also parallelizes the layer decoding that holds the GIL
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_extract_worker,
+                                       initargs=(input_path, layer_dir, base_name, compress_level, image_format,
+                                                 previous_keys))
+        extract_fn = _extract_worker
+        job_items = [(idx, idx in writing_jobs) for idx, entry in layer_jobs]
+        chunksize = max(1, len(job_items) // (workers * 4))
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+        extract_fn = extract
+        job_items = layer_jobs
+        chunksize = 1
+    
+    # Layer entries are written to the YAML file as soon as each layer is
+    # extracted instead of being collected in memory and dumped at the end.
+    # Decoding and PNG encoding run on worker threads (zlib releases the GIL)
+    # or processes; results are consumed in layer order so the output stays
+    # deterministic.
+    if write_yaml:
+        yaml_context = open(yaml_path, 'w', encoding='utf-8', buffering=YAML_WRITE_BUFFER)
+    else:
+        yaml_context = contextlib.nullcontext()
+    with executor, _cancel_pending_jobs(executor), yaml_context as yaml_file:
+        if yaml_file:
+            yaml.dump({
+                'source_file': input_path.name,
+                'document_width': psd.width,
+                'document_height': psd.height
+            }, yaml_file, Dumper=YAMLDumper, default_flow_style=False, sort_keys=False)
+        
+        layer_results = executor.map(extract_fn, job_items, chunksize=chunksize)
+        for (idx, (layer, folder_path, toggle_name, widget_info, number_widget_info)), layer_info in zip(layer_jobs, layer_results):
+            if layer_info:
+                cache_key = layer_info.pop('cache_key', None)
+                if cache_key:
+                    cache_keys[layer_info['filename']] = cache_key
+                if yaml_file:
+                    if layer_count == 0:
+                        yaml_file.write('layers:\n')
+                    yaml.dump([layer_info], yaml_file, Dumper=YAMLDumper, default_flow_style=False, sort_keys=False)
+                for key, column in layer_columns.items():
+                    column.append(layer_info.get(key))
+                layer_count += 1
+                if verbose:
+                    print(f"Extracted: {layer_info['filename']} at ({layer_info['x']}, {layer_info['y']})")
+                elif layer_count % PROGRESS_INTERVAL == 0:
+                    print(f"Extracted {layer_count} of {len(layer_jobs)} layers...")
                 
-                if not digit_found:
-                    # New digit for this Number widget
-                    has_decimal = digit_type.endswith('p')
-                    digit_info = {
-                        'name': digit_name,
-                        'has_decimal': has_decimal,
-                        'layers': [layer_info['filename']]
-                    }
-                    number_widgets_digits[number_widget_name].append(digit_info)
-            # Collect digit and range widget information (standalone widgets, not part of Number)
-            elif widget_info:
-                widget_type, widget_name = widget_info
-                if widget_name not in widgets:
-                    if widget_type.startswith('D:'):
-                        # Digit widget
-                        has_decimal = widget_type.endswith('p')
-                        # Extract segment count from digit type (e.g., "D:7" or "D:16")
-                        digit_type_clean = widget_type.rstrip('p')  # Remove 'p' if present
-                        segments = 7  # default
-                        if ':' in digit_type_clean:
-                            try:
-                                segments = int(digit_type_clean.split(':')[1])
-                            except (IndexError, ValueError):
-                                segments = 7
-                        widgets[widget_name] = {
-                            'type': 'digit',
-                            'segments': segments,
-                            'has_decimal': has_decimal,
+                # Collect toggle information
+                if toggle_name:
+                    if toggle_name not in widgets:
+                        widgets[toggle_name] = {
+                            'type': 'toggle',
                             'layers': []
                         }
-                    elif widget_type == 'R':
-                        # Range widget
-                        widgets[widget_name] = {
-                            'type': 'range',
-                            'layers': []
+                    widgets[toggle_name]['layers'].append(layer_info['filename'])
+                
+                # Handle Number/String widget digits
+                if number_widget_info:
+                    parent_widget_type, number_widget_name, digit_type, digit_name = number_widget_info
+                    
+                    # Initialize Number or String widget if not exists
+                    if number_widget_name not in widgets:
+                        widget_type = 'number' if parent_widget_type == 'N' else 'string'
+                        widgets[number_widget_name] = {
+                            'type': widget_type,
+                            'digits': []
+                        }
+                        number_widgets_digits[number_widget_name] = []
+                    
+                    # Check if this digit is already tracked
+                    digit_found = False
+                    for digit_info in number_widgets_digits[number_widget_name]:
+                        if digit_info['name'] == digit_name:
+                            # Add layer to existing digit
+                            digit_info['layers'].append(layer_info['filename'])
+                            digit_found = True
+                            break
+                    
+                    if not digit_found:
+                        # New digit for this Number widget
+                        has_decimal = digit_type.endswith('p')
+                        digit_info = {
+                            'name': digit_name,
+                            'has_decimal': has_decimal,
+                            'layers': [layer_info['filename']]
                         }
-                    elif widget_type == 'N':
-                        # Number widget (initialized above when we see child digits)
-                        # Create it here if no child digits exist yet
-                        if widget_name not in widgets:
+                        number_widgets_digits[number_widget_name].append(digit_info)
+                # Collect digit and range widget information (standalone widgets, not part of Number)
+                elif widget_info:
+                    widget_type, widget_name = widget_info
+                    if widget_name not in widgets:
+                        if widget_type.startswith('D:'):
+                            # Digit widget
+                            has_decimal = widget_type.endswith('p')
+                            # Extract segment count from digit type (e.g., "D:7" or "D:16")
+                            digit_type_clean = widget_type.rstrip('p')  # Remove 'p' if present
+                            segments = 7  # default
+                            if ':' in digit_type_clean:
+                                try:
+                                    segments = int(digit_type_clean.split(':')[1])
+                                except (IndexError, ValueError):
+                                    segments = 7
                             widgets[widget_name] = {
-                                'type': 'number',
-                                'digits': []
+                                'type': 'digit',
+                                'segments': segments,
+                                'has_decimal': has_decimal,
+                                'layers': []
                             }
-                            number_widgets_digits[widget_name] = []
-                    elif widget_type == 'S':
-                        # String widget (similar to Number but for alphanumeric text)
-                        # Create it here if no child digits exist yet
-                        if widget_name not in widgets:
+                        elif widget_type == 'R':
+                            # Range widget
                             widgets[widget_name] = {
-                                'type': 'string',
-                                'digits': []
+                                'type': 'range',
+                                'layers': []
                             }
-                            number_widgets_digits[widget_name] = []
-                
-                # Only add layers for non-Number and non-String widgets (these meta-widgets use their child digits)
-                if widget_type not in ('N', 'S'):
-                    widgets[widget_name]['layers'].append(layer_info['filename'])
-    
-    # Finalize Number widgets: reverse digit layers and add to widgets
-    for number_widget_name, digit_list in number_widgets_digits.items():
-        # Reverse each digit's layers (PSD stores bottom-to-top)
-        for digit_info in digit_list:
-            digit_info['layers'].reverse()
-        # Store the digits in the widget
-        widgets[number_widget_name]['digits'] = digit_list
-    
-    # Create YAML file
-    yaml_filename = f"{base_name}.yml"
-    yaml_path = output_dir / yaml_filename
+                        elif widget_type == 'N':
+                            # Number widget (initialized above when we see child digits)
+                            # Create it here if no child digits exist yet
+                            if widget_name not in widgets:
+                                widgets[widget_name] = {
+                                    'type': 'number',
+                                    'digits': []
+                                }
+                                number_widgets_digits[widget_name] = []
+                        elif widget_type == 'S':
+                            # String widget (similar to Number but for alphanumeric text)
+                            # Create it here if no child digits exist yet
+                            if widget_name not in widgets:
+                                widgets[widget_name] = {
+                                    'type': 'string',
+                                    'digits': []
+                                }
+                                number_widgets_digits[widget_name] = []
+                    
+                    # Only add layers for non-Number and non-String widgets (these meta-widgets use their child digits)
+                    if widget_type not in ('N', 'S'):
+                        widgets[widget_name]['layers'].append(layer_info['filename'])
+        
+        if yaml_file and layer_count == 0:
+            yaml_file.write('layers: []\n')
+        
+        # Finalize Number widgets: reverse digit layers and add to widgets
+        for number_widget_name, digit_list in number_widgets_digits.items():
+            # Reverse each digit's layers (PSD stores bottom-to-top)
+            for digit_info in digit_list:
+                digit_info['layers'].reverse()
+            # Store the digits in the widget
+            widgets[number_widget_name]['digits'] = digit_list
+        
+        # Add widgets section if any toggles were found
+        if widgets:
+            # Reverse layer order for digit widgets
+            # PSD files store layers bottom-to-top, but users arrange them top-to-bottom in UI
+            for widget_name, widget_data in widgets.items():
+                if widget_data['type'] == 'digit':
+                    widget_data['layers'].reverse()
+            if yaml_file:
+                yaml.dump({'widgets': widgets}, yaml_file, Dumper=YAMLDumper, default_flow_style=False, sort_keys=False)
     
-    yaml_data = {
+    # Write the same data as JSON for the HTML pages, which can load it with
+    # the browser's native parser instead of parsing YAML in JavaScript.
+    # Layers are stored column-wise so field names are not repeated per layer.
+    json_filename = f"{base_name}.json"
+    write_json_file({
         'source_file': input_path.name,
         'document_width': psd.width,
         'document_height': psd.height,
-        'layers': layers_info
-    }
+        'layers': layer_columns,
+        'widgets': widgets
+    }, output_dir / json_filename)
     
-    # Add widgets section if any toggles were found
-    if widgets:
-        # Reverse layer order for digit widgets
-        # PSD files store layers bottom-to-top, but users arrange them top-to-bottom in UI
-        for widget_name, widget_data in widgets.items():
-            if widget_data['type'] == 'digit':
-                widget_data['layers'].reverse()
-        yaml_data['widgets'] = widgets
-    
-    with open(yaml_path, 'w') as f:
-        yaml.dump(yaml_data, f, default_flow_style=False, sort_keys=False)
-    
-    print(f"\nExtracted {len(layers_info)} layers to: {output_dir}")
-    print(f"Layer information saved to: {yaml_path}")
+    if postopt:
+        png_paths = [output_dir / filename for filename in dict.fromkeys(layer_columns['filename'])
+                     if filename.endswith('.png')]
+        print(f"Optimizing {len(png_paths)} PNG files with {postopt}...")
+        if not optimize_pngs(png_paths, postopt, jobs):
+            print(f"Warning: {postopt} not found on PATH, PNG files were not optimized", file=sys.stderr)
+    
+    # pngquant changes the pixels, so its output must not be kept by a later
+    # incremental run; oxipng is lossless and its output can be
+    if incremental and postopt != 'pngquant':
+        write_json_file(cache_keys, cache_path)
+    
+    print(f"\nExtracted {layer_count} layers to: {output_dir}")
+    print(f"Layer information saved to: {yaml_path or output_dir / json_filename}")
     if widgets:
         print(f"Found {len(widgets)} widget(s): {', '.join(widgets.keys())}")
     
     # Create LCD screen HTML
-    lcd_screen_path = create_lcd_screen_html(output_dir, yaml_filename)
+    lcd_screen_path = create_lcd_screen_html(output_dir, json_filename)
     print(f"LCD screen page created: {lcd_screen_path}")
     
     # Create index HTML container
-    index_path = create_index_html(output_dir, yaml_filename)
+    index_path = create_index_html(output_dir, json_filename)
     print(f"Index page created: {index_path}")
     
     return output_dir, yaml_path
 
 
+def positive_int(value):
+    """
+    Parse a command line value as an integer greater than zero.
+    
+    Args:
+        value: The argument string
+        
+    Returns:
+        int: The parsed value
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
 def main():
     """Main entry point for the script."""
     parser = argparse.ArgumentParser(
@@ -2056,10 +2328,80 @@ Examples:
         default=None
     )
     
+    parser.add_argument(
+        '-j', '--jobs',
+        type=positive_int,
+        help='Number of layers to extract in parallel (default: number of CPUs)',
+        default=None
+    )
+    
+    parser.add_argument(
+        '-v', '--verbose',
+        action='store_true',
+        help='Print every extracted layer (default: progress every %d layers)' % PROGRESS_INTERVAL
+    )
+    
+    parser.add_argument(
+        '-p', '--processes',
+        action='store_true',
+        help='Extract layers in worker processes instead of threads '
+             '(faster on many cores, but each process loads its own copy of the file)'
+    )
+    
+    parser.add_argument(
+        '--compress-level',
+        type=int,
+        choices=range(10),
+        metavar='{0-9}',
+        help='zlib compression level for the layer PNGs (default: %d, use 9 for the smallest files)' % PNG_COMPRESS_LEVEL,
+        default=PNG_COMPRESS_LEVEL
+    )
+    
+    parser.add_argument(
+        '--image-format',
+        choices=('png', 'webp'),
+        help='Image format for the extracted layers; webp is lossless and usually '
+             'faster to encode and smaller (default: png)',
+        default='png'
+    )
+    
+    parser.add_argument(
+        '--skip-hidden',
+        action='store_true',
+        help='Skip layers that are hidden or have zero opacity in the PSB/PSD file (by '
+             'default hidden layers are extracted, since widget layers such as digit '
+             'segments are often hidden)'
+    )
+    
+    parser.add_argument(
+        '--no-yaml',
+        dest='write_yaml',
+        action='store_false',
+        help='Do not write the YAML file, only the JSON file used by the HTML pages'
+    )
+    
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Only re-encode layers that changed since the last run into the same '
+             'output directory'
+    )
+    
+    parser.add_argument(
+        '--postopt',
+        choices=('none', 'oxipng', 'pngquant'),
+        help='Optimize the PNG files after extraction for a smaller archive: oxipng is '
+             'lossless, pngquant is lossy. The tool must be installed (default: none)',
+        default='none'
+    )
+    
     args = parser.parse_args()
     
     try:
-        extract_psb_layers(args.input_file, args.output_dir)
+        extract_psb_layers(args.input_file, args.output_dir, args.jobs, args.verbose, args.processes,
+                           args.compress_level, args.image_format, args.skip_hidden,
+                           None if args.postopt == 'none' else args.postopt, args.incremental,
+                           args.write_yaml)
         return 0
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
@@ -3,12 +3,18 @@
 Test script for validating the layer extraction with folder-based naming.
 """
 
+import contextlib
+import io
+import json
 import sys
 import tempfile
+import threading
+import time
 from pathlib import Path
 from PIL import Image, ImageDraw
 from psd_tools import PSDImage
 from psd_tools.api.layers import Group, PixelLayer
+import yaml
 import extract_layers
 
 
@@ -96,6 +102,562 @@ def test_ignore_hash_prefix():
     return True
 
 
+def test_extract_layer_dimensions():
+    """
+    Test that extracted layer positions and sizes match the saved images.
+    """
+    print("\nTesting extracted layer dimensions...")
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        psd_path = tmpdir / "test.psd"
+        
+        # Build a small PSD with a root layer and a layer inside a folder
+        psd = PSDImage.new('RGBA', (200, 100))
+        background = PixelLayer.frompil(Image.new('RGBA', (200, 100), (10, 10, 10, 255)), psd, 'Background', 0, 0)
+        psd.append(background)
+        segment = PixelLayer.frompil(Image.new('RGBA', (40, 10), (255, 0, 0, 255)), psd, 'Segment', 30, 20)
+        psd.append(segment)
+        psd.create_group([segment], 'Digit')
+        psd.save(psd_path)
+        
+        output_dir, yaml_path = extract_layers.extract_psb_layers(psd_path, tmpdir / "out")
+        
+        with open(yaml_path) as f:
+            data = yaml.safe_load(f)
+        
+        expected = {
+            'Background.png': (0, 0, 200, 100),
+            'Digit--Segment.png': (20, 30, 40, 10),
+        }
+        
+        if len(data['layers']) != len(expected):
+            print(f"✗ Expected {len(expected)} layers, got {len(data['layers'])}")
+            return False
+        
+        for layer in data['layers']:
+            actual = (layer['x'], layer['y'], layer['width'], layer['height'])
+            if actual != expected[layer['filename']]:
+                print(f"✗ {layer['filename']}: expected {expected[layer['filename']]}, got {actual}")
+                return False
+            
+            with Image.open(output_dir / layer['filename']) as image:
+                if image.size != (layer['width'], layer['height']):
+                    print(f"✗ {layer['filename']}: image size {image.size} does not match YAML")
+                    return False
+            
+            print(f"✓ {layer['filename']} at ({layer['x']}, {layer['y']}) size {layer['width']}x{layer['height']}")
+    
+    return True
+
+
+def test_duplicate_layers():
+    """
+    Test that duplicate layers are encoded once and that layers with the same
+    filename do not corrupt the images shared between duplicates.
+    """
+    print("\nTesting duplicate layers and filename collisions...")
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        psd_path = tmpdir / "test.psd"
+        
+        red = (255, 0, 0, 255)
+        blue = (0, 0, 255, 255)
+        psd = PSDImage.new('RGBA', (100, 100))
+        # Both 'X' layers write X.png; the last one owns it, as in Photoshop's
+        # top-most layer. 'Y' and 'Z' are duplicates of the first 'X'.
+        for name, color in (('X', red), ('X', blue), ('Y', red), ('Z', red)):
+            psd.append(PixelLayer.frompil(Image.new('RGBA', (10, 10), color), psd, name, 0, 0))
+        psd.save(psd_path)
+        
+        decoded = []
+        original_topil = PixelLayer.topil
+        def counting_topil(layer, *args, **kwargs):
+            decoded.append(layer.name)
+            return original_topil(layer, *args, **kwargs)
+        
+        expected = {'X.png': blue, 'Y.png': red, 'Z.png': red}
+        for jobs, processes in ((1, False), (4, False), (2, True)):
+            decoded.clear()
+            PixelLayer.topil = counting_topil
+            try:
+                output_dir, _ = extract_layers.extract_psb_layers(psd_path, tmpdir / f"out_{jobs}_{processes}",
+                                                                  jobs=jobs, processes=processes)
+            finally:
+                PixelLayer.topil = original_topil
+            
+            for filename, color in expected.items():
+                with Image.open(output_dir / filename) as image:
+                    actual = image.convert('RGBA').getpixel((0, 0))
+                if actual != color:
+                    print(f"✗ jobs={jobs}, processes={processes}: {filename} is {actual}, expected {color}")
+                    return False
+            
+            # Sequentially, only the blue 'X' and the first red layer are decoded
+            if jobs == 1 and sorted(decoded) != ['X', 'Y']:
+                print(f"✗ Expected only X and Y to be decoded, got {decoded}")
+                return False
+            print(f"✓ jobs={jobs}, processes={processes}: correct images")
+    
+    return True
+
+
+def test_skip_offcanvas_layers():
+    """
+    Test that layers entirely outside the document are not extracted.
+    """
+    print("\nTesting off-canvas layer filtering...")
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        psd_path = tmpdir / "test.psd"
+        
+        psd = PSDImage.new('RGBA', (200, 100))
+        psd.append(PixelLayer.frompil(Image.new('RGBA', (200, 100), (10, 10, 10, 255)), psd, 'Background', 0, 0))
+        psd.append(PixelLayer.frompil(Image.new('RGBA', (40, 10), (255, 0, 0, 255)), psd, 'Partly', 95, 180))
+        psd.append(PixelLayer.frompil(Image.new('RGBA', (40, 10), (255, 0, 0, 255)), psd, 'Outside', 20, 300))
+        psd.save(psd_path)
+        
+        output_dir, yaml_path = extract_layers.extract_psb_layers(psd_path, tmpdir / "out")
+        
+        with open(yaml_path) as f:
+            data = yaml.safe_load(f)
+        
+        filenames = [layer['filename'] for layer in data['layers']]
+        if filenames != ['Background.png', 'Partly.png']:
+            print(f"✗ Expected Background.png and Partly.png, got {filenames}")
+            return False
+        if (output_dir / 'Outside.png').exists():
+            print("✗ Off-canvas layer was written")
+            return False
+        print("✓ Partly visible layer kept, off-canvas layer skipped")
+    
+    return True
+
+
+def test_skip_hidden_layers():
+    """
+    Test that skip_hidden drops hidden and zero-opacity layers.
+    """
+    print("\nTesting hidden layer filtering...")
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        psd_path = tmpdir / "test.psd"
+        
+        psd = PSDImage.new('RGBA', (200, 100))
+        psd.append(PixelLayer.frompil(Image.new('RGBA', (200, 100), (10, 10, 10, 255)), psd, 'Background', 0, 0))
+        hidden = PixelLayer.frompil(Image.new('RGBA', (40, 10), (255, 0, 0, 255)), psd, 'Hidden', 20, 30)
+        hidden.visible = False
+        psd.append(hidden)
+        transparent = PixelLayer.frompil(Image.new('RGBA', (40, 10), (0, 255, 0, 255)), psd, 'Transparent', 40, 30)
+        transparent.opacity = 0
+        psd.append(transparent)
+        psd.save(psd_path)
+        
+        for skip_hidden, expected in ((False, ['Background.png', 'Hidden.png', 'Transparent.png']),
+                                      (True, ['Background.png'])):
+            output_dir, yaml_path = extract_layers.extract_psb_layers(psd_path, tmpdir / f"out_{skip_hidden}",
+                                                                      skip_hidden=skip_hidden)
+            with open(yaml_path) as f:
+                filenames = [layer['filename'] for layer in yaml.safe_load(f)['layers']]
+            if filenames != expected:
+                print(f"✗ skip_hidden={skip_hidden}: expected {expected}, got {filenames}")
+                return False
+            print(f"✓ skip_hidden={skip_hidden}: {', '.join(filenames)}")
+    
+    return True
+
+
+def test_extract_with_processes():
+    """
+    Test that extracting in worker processes gives the same output as threads.
+    """
+    print("\nTesting extraction in worker processes...")
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        psd_path = tmpdir / "test.psd"
+        
+        psd = PSDImage.new('RGBA', (200, 100))
+        psd.append(PixelLayer.frompil(Image.new('RGBA', (200, 100), (10, 10, 10, 255)), psd, 'Background', 0, 0))
+        segments = []
+        for i in range(3):
+            segment = PixelLayer.frompil(Image.new('RGBA', (40, 10), (255, i * 100, 0, 255)), psd, f'Segment {i}', 10 + i * 20, 20)
+            psd.append(segment)
+            segments.append(segment)
+        psd.create_group(segments, '[D:7]Digit')
+        psd.save(psd_path)
+        
+        thread_dir, thread_yaml = extract_layers.extract_psb_layers(psd_path, tmpdir / "threads", jobs=2)
+        process_dir, process_yaml = extract_layers.extract_psb_layers(psd_path, tmpdir / "processes", jobs=2, processes=True)
+        
+        if thread_yaml.read_text() != process_yaml.read_text():
+            print("✗ YAML output differs between threads and processes")
+            return False
+        
+        for png_path in sorted(thread_dir.glob('*.png')):
+            if png_path.read_bytes() != (process_dir / png_path.name).read_bytes():
+                print(f"✗ {png_path.name} differs between threads and processes")
+                return False
+            print(f"✓ {png_path.name} matches")
+    
+    return True
+
+
+def test_extract_without_yaml():
+    """
+    Test that write_yaml=False writes the same JSON data file and no YAML file.
+    """
+    print("\nTesting extraction without YAML output...")
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        psd_path = tmpdir / "test.psd"
+        
+        psd = PSDImage.new('RGBA', (200, 100))
+        psd.append(PixelLayer.frompil(Image.new('RGBA', (200, 100), (10, 10, 10, 255)), psd, 'Background', 0, 0))
+        segment = PixelLayer.frompil(Image.new('RGBA', (40, 10), (255, 0, 0, 255)), psd, 'Segment', 20, 30)
+        psd.append(segment)
+        psd.create_group([segment], '[T]Light')
+        psd.save(psd_path)
+        
+        yaml_dir, _ = extract_layers.extract_psb_layers(psd_path, tmpdir / "yaml")
+        json_dir, yaml_path = extract_layers.extract_psb_layers(psd_path, tmpdir / "json", write_yaml=False)
+        
+        if yaml_path is not None or list(json_dir.glob('*.yml')):
+            print("✗ YAML file was written")
+            return False
+        if (json_dir / 'test.json').read_bytes() != (yaml_dir / 'test.json').read_bytes():
+            print("✗ JSON data file differs from the one written with YAML")
+            return False
+        print("✓ Only the JSON data file was written, with the same content")
+        
+        # The column-wise JSON layers must hold the same rows as the YAML
+        with open(yaml_dir / 'test.yml') as f:
+            yaml_data = yaml.safe_load(f)
+        json_data = json.loads((yaml_dir / 'test.json').read_text())
+        columns = json_data['layers']
+        rows = []
+        for values in zip(*columns.values()):
+            row = dict(zip(columns, values))
+            if row['toggle'] is None:
+                del row['toggle']
+            rows.append(row)
+        if rows != yaml_data['layers']:
+            print(f"✗ JSON layers {rows} differ from YAML layers {yaml_data['layers']}")
+            return False
+        if json_data['widgets'] != yaml_data['widgets']:
+            print("✗ JSON widgets differ from YAML widgets")
+            return False
+        print(f"✓ JSON columns rebuild the {len(rows)} YAML layers, including toggles")
+    
+    return True
+
+
+def test_incremental_extraction():
+    """
+    Test that --incremental keeps unchanged layer images from the previous run.
+    """
+    print("\nTesting incremental extraction...")
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        psd_path = tmpdir / "test.psd"
+        
+        psd = PSDImage.new('RGBA', (200, 100))
+        psd.append(PixelLayer.frompil(Image.new('RGBA', (200, 100), (10, 10, 10, 255)), psd, 'Background', 0, 0))
+        psd.append(PixelLayer.frompil(Image.new('RGBA', (40, 10), (255, 0, 0, 255)), psd, 'Segment', 20, 30))
+        psd.save(psd_path)
+        
+        output_dir, yaml_path = extract_layers.extract_psb_layers(psd_path, tmpdir / "out", incremental=True)
+        first_yaml = yaml_path.read_text()
+        # Files are replaced on every write, so an unchanged inode means the file was kept
+        inodes = {path.name: path.stat().st_ino for path in output_dir.glob('*.png')}
+        
+        extract_layers.extract_psb_layers(psd_path, output_dir, incremental=True)
+        for name, inode in inodes.items():
+            if (output_dir / name).stat().st_ino != inode:
+                print(f"✗ {name} was rewritten although the layer did not change")
+                return False
+        if yaml_path.read_text() != first_yaml:
+            print("✗ YAML output differs from the first run")
+            return False
+        print("✓ Unchanged layers kept on the second run")
+        
+        extract_layers.extract_psb_layers(psd_path, output_dir, incremental=True, compress_level=9)
+        if (output_dir / 'Background.png').stat().st_ino == inodes['Background.png']:
+            print("✗ Background.png was kept although the compression level changed")
+            return False
+        print("✓ Layers re-encoded when the settings changed")
+        
+        # A run without incremental replaces the images; the next incremental
+        # run must not trust the cache written before it
+        blue_path = tmpdir / "blue.psd"
+        blue = PSDImage.new('RGBA', (200, 100))
+        blue.append(PixelLayer.frompil(Image.new('RGBA', (200, 100), (0, 0, 255, 255)), blue, 'Background', 0, 0))
+        blue.save(blue_path)
+        extract_layers.extract_psb_layers(blue_path, output_dir, compress_level=9)
+        extract_layers.extract_psb_layers(psd_path, output_dir, incremental=True, compress_level=9)
+        with Image.open(output_dir / 'Background.png') as image:
+            if image.convert('RGBA').getpixel((0, 0)) != (10, 10, 10, 255):
+                print("✗ Stale layer cache kept an image written by a non-incremental run")
+                return False
+        print("✓ Non-incremental runs invalidate the layer cache")
+    
+    return True
+
+
+def test_interrupted_extraction():
+    """
+    Test that an error while collecting results stops the remaining layers.
+    """
+    print("\nTesting interrupted extraction...")
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        psd_path = tmpdir / "test.psd"
+        
+        layer_count = 40
+        psd = PSDImage.new('RGBA', (200, 100))
+        for i in range(layer_count):
+            psd.append(PixelLayer.frompil(Image.new('RGBA', (10, 10), (i, 0, 0, 255)), psd, f'Layer {i}', 0, i))
+        psd.save(psd_path)
+        
+        decoded = []
+        original_topil = PixelLayer.topil
+        def slow_topil(layer, *args, **kwargs):
+            decoded.append(layer.name)
+            time.sleep(0.02)
+            return original_topil(layer, *args, **kwargs)
+        
+        # The first call writes the header, the second the first layer entry
+        dump_calls = []
+        original_dump = yaml.dump
+        def interrupting_dump(*args, **kwargs):
+            dump_calls.append(args)
+            if len(dump_calls) == 2:
+                raise KeyboardInterrupt
+            return original_dump(*args, **kwargs)
+        
+        PixelLayer.topil = slow_topil
+        yaml.dump = interrupting_dump
+        try:
+            extract_layers.extract_psb_layers(psd_path, tmpdir / "out", jobs=2)
+            print("✗ KeyboardInterrupt was not raised")
+            return False
+        except KeyboardInterrupt:
+            pass
+        finally:
+            PixelLayer.topil = original_topil
+            yaml.dump = original_dump
+        
+        if len(decoded) >= layer_count // 2:
+            print(f"✗ {len(decoded)} of {layer_count} layers were still decoded after the interrupt")
+            return False
+        print(f"✓ Only {len(decoded)} of {layer_count} layers decoded after the interrupt")
+    
+    return True
+
+
+def test_palette_conversion():
+    """
+    Test that low-color layers are converted to palette mode without changing pixels.
+    """
+    print("\nTesting palette conversion...")
+    
+    # A single-color shape with anti-aliased edges, like an LCD segment
+    segment = Image.new('RGBA', (80, 30), (0, 0, 0, 0))
+    ImageDraw.Draw(segment).polygon([(5, 15), (15, 2), (65, 2), (75, 15), (65, 28), (15, 28)], fill=(255, 60, 20, 255))
+    segment = segment.resize((40, 15), Image.LANCZOS)
+    
+    palette_image = extract_layers.to_palette_image(segment)
+    if palette_image is None or palette_image.mode != 'P':
+        print("✗ Low-color layer was not converted to palette mode")
+        return False
+    if palette_image.convert('RGBA').tobytes() != segment.tobytes():
+        print("✗ Palette conversion changed pixel values")
+        return False
+    print(f"✓ {len(segment.getcolors())} colors converted exactly")
+
+    # Large layers are mapped in bands of rows; use bands that split the
+    # segment unevenly and must still give the same pixels
+    band_pixels = extract_layers.PALETTE_BAND_PIXELS
+    extract_layers.PALETTE_BAND_PIXELS = segment.width * 4
+    try:
+        banded_image = extract_layers.to_palette_image(segment)
+    finally:
+        extract_layers.PALETTE_BAND_PIXELS = band_pixels
+    if banded_image.convert('RGBA').tobytes() != segment.tobytes():
+        print("✗ Banded palette conversion changed pixel values")
+        return False
+    print("✓ Banded palette conversion is exact")
+
+    # More than 256 distinct colors must stay RGBA
+    gradient = Image.new('RGBA', (300, 1))
+    gradient.putdata([(x % 256, x // 256, 0, 255) for x in range(300)])
+    if extract_layers.to_palette_image(gradient) is not None:
+        print("✗ Layer with more than 256 colors was converted")
+        return False
+    print("✓ Layer with more than 256 colors left unchanged")
+    
+    return True
+
+
+def test_webp_output():
+    """
+    Test that image_format='webp' writes lossless WebP layers, falls back to PNG
+    for layers too large for WebP, and fails early without WebP support.
+    """
+    print("\nTesting WebP output...")
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        psd_path = tmpdir / "test.psd"
+        
+        # Layers with many colors, so lossy or palette encoding would show
+        background = Image.new('RGBA', (200, 100))
+        background.putdata([(x, y, (x * y) % 256, 255) for y in range(100) for x in range(200)])
+        segment = Image.new('RGBA', (40, 10))
+        segment.putdata([(255, x * 6, y * 25, 128 + y * 12) for y in range(10) for x in range(40)])
+        psd = PSDImage.new('RGBA', (200, 100))
+        psd.append(PixelLayer.frompil(background, psd, 'Background', 0, 0))
+        psd.append(PixelLayer.frompil(segment, psd, 'Segment', 20, 30))
+        psd.save(psd_path)
+        sources = {'Background': background, 'Segment': segment}
+        
+        # Lower the size limit so that the background falls back to PNG
+        webp_max_size = extract_layers.WEBP_MAX_SIZE
+        extract_layers.WEBP_MAX_SIZE = 100
+        try:
+            output_dir, yaml_path = extract_layers.extract_psb_layers(psd_path, tmpdir / "out", image_format='webp')
+        finally:
+            extract_layers.WEBP_MAX_SIZE = webp_max_size
+        
+        with open(yaml_path) as f:
+            data = yaml.safe_load(f)
+        filenames = sorted(layer['filename'] for layer in data['layers'])
+        if filenames != ['Background.png', 'Segment.webp']:
+            print(f"✗ Expected Background.png and Segment.webp, got {filenames}")
+            return False
+        for layer in data['layers']:
+            with Image.open(output_dir / layer['filename']) as image:
+                if image.convert('RGBA').tobytes() != sources[layer['name']].tobytes():
+                    print(f"✗ {layer['filename']} does not decode to the layer pixels")
+                    return False
+        print("✓ WebP layers written losslessly, larger layers as PNG")
+        
+        # At the real limit, a layer one pixel wider than WebP allows is PNG
+        wide = PixelLayer.frompil(Image.new('RGBA', (extract_layers.WEBP_MAX_SIZE + 1, 1)), psd, 'Wide', 0, 0)
+        at_limit = PixelLayer.frompil(Image.new('RGBA', (extract_layers.WEBP_MAX_SIZE, 1)), psd, 'Limit', 0, 0)
+        names = [extract_layers.get_layer_filename(layer, 0, image_format='webp')[0] for layer in (wide, at_limit)]
+        if names != ['Wide.png', 'Limit.webp']:
+            print(f"✗ Expected Wide.png and Limit.webp, got {names}")
+            return False
+        print(f"✓ Layers wider than {extract_layers.WEBP_MAX_SIZE} pixels fall back to PNG")
+        
+        # Without WebP support in Pillow, fail before writing anything
+        from PIL import features
+        original_check = features.check
+        features.check = lambda feature: feature != 'webp' and original_check(feature)
+        try:
+            extract_layers.extract_psb_layers(psd_path, tmpdir / "nowebp", image_format='webp')
+        except RuntimeError:
+            pass
+        else:
+            print("✗ Extraction without WebP support did not fail")
+            return False
+        finally:
+            features.check = original_check
+        if (tmpdir / "nowebp").exists():
+            print("✗ Output was written although WebP is not supported")
+            return False
+        print("✓ Missing WebP support is reported before extraction")
+    
+    return True
+
+
+def test_optimize_pngs():
+    """
+    Test the optimizer command lines and the warning when the tool is missing.
+    """
+    print("\nTesting PNG post-optimization...")
+    
+    original_which = extract_layers.shutil.which
+    original_run = extract_layers.subprocess.run
+    original_batch_size = extract_layers.OXIPNG_BATCH_SIZE
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        psd_path = tmpdir / "test.psd"
+        
+        psd = PSDImage.new('RGBA', (200, 100))
+        psd.append(PixelLayer.frompil(Image.new('RGBA', (200, 100), (10, 10, 10, 255)), psd, 'Background', 0, 0))
+        psd.save(psd_path)
+        
+        # A missing tool leaves the PNGs as they are and prints a warning
+        stderr = io.StringIO()
+        extract_layers.shutil.which = lambda name: None
+        try:
+            with contextlib.redirect_stderr(stderr):
+                output_dir, _ = extract_layers.extract_psb_layers(psd_path, tmpdir / "out", postopt='oxipng')
+        finally:
+            extract_layers.shutil.which = original_which
+        if "Warning: oxipng not found on PATH" not in stderr.getvalue():
+            print(f"✗ Expected a missing tool warning, got {stderr.getvalue()!r}")
+            return False
+        if not (output_dir / 'Background.png').exists():
+            print("✗ Background.png missing after skipped optimization")
+            return False
+        print("✓ Missing optimizer reported with a warning")
+    
+    # Record the command lines instead of running the tools
+    calls = []
+    threads = set()
+    def record_run(args, *more_args, **kwargs):
+        calls.append(args)
+        threads.add(threading.current_thread())
+    
+    png_paths = [Path(f"layer_{i}.png") for i in range(5)]
+    expected_paths = [str(path) for path in png_paths]
+    extract_layers.shutil.which = lambda name: f"/usr/bin/{name}"
+    extract_layers.subprocess.run = record_run
+    extract_layers.OXIPNG_BATCH_SIZE = 2
+    try:
+        oxipng_ran = extract_layers.optimize_pngs(png_paths, 'oxipng', jobs=3)
+        oxipng_calls = list(calls)
+        calls.clear()
+        threads.clear()
+        pngquant_ran = extract_layers.optimize_pngs(png_paths, 'pngquant', jobs=2)
+    finally:
+        extract_layers.shutil.which = original_which
+        extract_layers.subprocess.run = original_run
+        extract_layers.OXIPNG_BATCH_SIZE = original_batch_size
+    
+    if not (oxipng_ran and pngquant_ran):
+        print("✗ optimize_pngs reported a missing tool")
+        return False
+    
+    oxipng_args = ['/usr/bin/oxipng', '-o', '2', '--strip', 'safe', '--threads', '3']
+    expected = [oxipng_args + expected_paths[0:2], oxipng_args + expected_paths[2:4], oxipng_args + expected_paths[4:5]]
+    if oxipng_calls != expected:
+        print(f"✗ Unexpected oxipng calls: {oxipng_calls}")
+        return False
+    print("✓ oxipng run in batches of OXIPNG_BATCH_SIZE files")
+    
+    pngquant_args = ['/usr/bin/pngquant', '--force', '--skip-if-larger', '--ext', '.png']
+    if sorted(calls) != [pngquant_args + [path] for path in expected_paths]:
+        print(f"✗ Unexpected pngquant calls: {calls}")
+        return False
+    if threading.main_thread() in threads:
+        print("✗ pngquant was run on the main thread")
+        return False
+    print("✓ pngquant run once per file on a thread pool")
+    
+    return True
+
+
 def main():
     """Run all tests."""
     print("=" * 60)
@@ -112,6 +674,50 @@ def main():
     if not test_ignore_hash_prefix():
         all_passed = False
     
+    # Test extracted positions and sizes
+    if not test_extract_layer_dimensions():
+        all_passed = False
+    
+    # Test duplicate layers and filename collisions
+    if not test_duplicate_layers():
+        all_passed = False
+    
+    # Test off-canvas layer filtering
+    if not test_skip_offcanvas_layers():
+        all_passed = False
+    
+    # Test hidden layer filtering
+    if not test_skip_hidden_layers():
+        all_passed = False
+    
+    # Test extraction in worker processes
+    if not test_extract_with_processes():
+        all_passed = False
+    
+    # Test extraction without YAML output
+    if not test_extract_without_yaml():
+        all_passed = False
+    
+    # Test incremental extraction
+    if not test_incremental_extraction():
+        all_passed = False
+    
+    # Test interrupted extraction
+    if not test_interrupted_extraction():
+        all_passed = False
+    
+    # Test palette conversion of low-color layers
+    if not test_palette_conversion():
+        all_passed = False
+    
+    # Test WebP output
+    if not test_webp_output():
+        all_passed = False
+    
+    # Test PNG post-optimization
+    if not test_optimize_pngs():
+        all_passed = False
+    
     print("\n" + "=" * 60)
     if all_passed:
         print("✓ All tests passed!")
@@ -132,6 +132,45 @@ def test_process_layers_recursive():
     return True
 
 
+def test_deeply_nested_groups():
+    """Test that group nesting deeper than the recursion limit is processed."""
+    import extract_layers
+    
+    print("\nTesting deeply nested groups...")
+    
+    depth = sys.getrecursionlimit() + 100
+    root_group = MockLayer("Level0", is_group=True)
+    current = root_group
+    for level in range(1, depth):
+        group = MockLayer(f"Level{level}", is_group=True)
+        current.add_child(group)
+        current = group
+    current.add_child(MockLayer("Deep", 10, 20, 30, 40))
+    
+    class MockRoot:
+        def __iter__(self):
+            return iter([root_group])
+    
+    all_layers = []
+    try:
+        extract_layers.process_layers_recursive(MockRoot(), all_layers)
+    except RecursionError:
+        print(f"✗ RecursionError at depth {depth}")
+        return False
+    
+    if len(all_layers) != 1:
+        print(f"✗ Expected 1 layer, got {len(all_layers)}")
+        return False
+    
+    layer, folder_path = all_layers[0][0], all_layers[0][1]
+    if layer.name != "Deep" or len(folder_path) != depth or folder_path[-1] != f"Level{depth - 1}":
+        print(f"✗ Unexpected result: '{layer.name}' with {len(folder_path)} folders")
+        return False
+    
+    print(f"✓ Layer found at depth {depth}")
+    return True
+
+
 def main():
     """Run all integration tests."""
     print("=" * 60)
@@ -142,6 +181,10 @@ def main():
         print("\n✗ Tests failed")
         return 1
     
+    if not test_deeply_nested_groups():
+        print("\n✗ Tests failed")
+        return 1
+    
     print("\n" + "=" * 60)
     print("✓ All integration tests passed!")
     print("=" * 60)